@@ -7,9 +7,12 @@ from homeassistant.core import HomeAssistant
 import homeassistant.helpers.config_validation as cv
 import logging
 
-_LOGGER = logging.getLogger(__name__)
+from easunpy.async_isolar import AsyncISolar
+
+from .const import DOMAIN
+from .coordinator import EasunCoordinator
 
-DOMAIN = "easun_inverter"
+_LOGGER = logging.getLogger(__name__)
 
 # List of platforms to support. There should be a matching .py file for each,
 # eg. switch.py and sensor.py
@@ -23,18 +26,15 @@ async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
     _LOGGER.debug("Migrating from version %s", config_entry.version)
 
     if config_entry.version < 4:
-        new_data = {**config_entry.data}
-        
-        # Add model with default value if it doesn't exist
-        if "model" not in new_data:
-            new_data["model"] = "ISOLAR_SMG_II_11K"
-            
-        # Update the entry with new data and version
-        hass.config_entries.async_update_entry(
-            config_entry,
-            data=new_data,
-            version=4
-        )
+        # Add model with default value if it doesn't exist; otherwise only bump the version
+        if "model" not in config_entry.data:
+            hass.config_entries.async_update_entry(
+                config_entry,
+                data={**config_entry.data, "model": "ISOLAR_SMG_II_11K"},
+                version=4
+            )
+        else:
+            hass.config_entries.async_update_entry(config_entry, version=4)
         _LOGGER.info("Migration to version %s successful", 4)
 
     return True
@@ -51,10 +51,26 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             return False
 
     model = entry.data["model"]  # No default - should be required
-    _LOGGER.warning(f"Setting up inverter with model: {model}, config data: {entry.data}")
+    _LOGGER.warning("Setting up inverter with model: %s, config data: %s", model, entry.data)
     
-    # Initialize domain data
-    hass.data.setdefault(DOMAIN, {})
+    inverter_ip = entry.data.get("inverter_ip")
+    local_ip = entry.data.get("local_ip")
+    if not inverter_ip or not local_ip:
+        _LOGGER.error("Missing inverter IP or local IP in config entry")
+        return False
+
+    scan_interval = entry.options.get(
+        "scan_interval",
+        entry.data.get("scan_interval", 30)
+    )
+
+    # One client and coordinator per entry, shared by its platforms and the options flow
+    isolar = AsyncISolar(inverter_ip=inverter_ip, local_ip=local_ip, model=model)
+    coordinator = EasunCoordinator(hass, isolar, scan_interval)
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
+        "isolar": isolar,
+        "coordinator": coordinator,
+    }
     
     # Forward the setup to the sensor platform
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
@@ -65,18 +81,13 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     _LOGGER.debug("Unloading Easun ISolar Inverter config entry")
     
-    # Cleanup any update listeners
-    if entry.entry_id in hass.data[DOMAIN]:
-        if "update_listener" in hass.data[DOMAIN][entry.entry_id]:
-            _LOGGER.debug("Cancelling update listener")
-            hass.data[DOMAIN][entry.entry_id]["update_listener"]()
-    
     # Unload the sensor platform
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     
-    # Clean up domain data
+    # Close the inverter connection and clean up domain data
     if unload_ok and entry.entry_id in hass.data[DOMAIN]:
         _LOGGER.debug("Removing entry data")
-        hass.data[DOMAIN].pop(entry.entry_id)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        await entry_data["isolar"].close()
     
     return unload_ok 
\ No newline at end of file
@@ -6,10 +6,8 @@ from homeassistant import config_entries
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.core import callback
 import logging
-from homeassistant.helpers.event import async_track_time_interval
-from datetime import timedelta
 
-from . import DOMAIN
+from .const import DOMAIN
 from easunpy.discover import discover_device
 from easunpy.utils import get_local_ip
 from easunpy.models import MODEL_CONFIGS
@@ -39,7 +37,7 @@ class EasunInverterConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             scan_interval = user_input.get("scan_interval", DEFAULT_SCAN_INTERVAL)
             model = user_input.get("model")  # Get model from input
             
-            _LOGGER.debug(f"Processing user input with model: {model}")
+            _LOGGER.debug("Processing user input with model: %s", model)
             
             if not inverter_ip or not local_ip:
                 errors["base"] = "missing_ip"
@@ -50,7 +48,7 @@ class EasunInverterConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     "scan_interval": scan_interval,
                     "model": model,
                 }
-                _LOGGER.debug(f"Creating entry with data: {entry_data}")
+                _LOGGER.debug("Creating entry with data: %s", entry_data)
                 return self.async_create_entry(
                     title=f"Easun Inverter ({inverter_ip})",
                     data=entry_data,
@@ -88,7 +86,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
     async def async_step_init(self, user_input=None):
         """Manage the options."""
         if user_input is not None:
-            _LOGGER.debug(f"Updating config entry with new input: {user_input}")
+            _LOGGER.debug("Updating config entry with new input: %s", user_input)
             
             # Get the entry data
             entry_data = self.hass.data[DOMAIN].get(self.config_entry.entry_id, {})
@@ -100,24 +98,11 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 if user_input["model"] != self.config_entry.data.get("model"):
                     await coordinator.update_model(user_input["model"])
                 
-                # Update scan interval without reloading
-                if "update_listener" in entry_data:
-                    entry_data["update_listener"]()
-                    entry_data.pop("update_listener")
-                
-                # Set up new scan interval
+                # Update scan interval without reloading; applies from the next refresh
                 new_interval = user_input["scan_interval"]
+                coordinator.set_scan_interval(new_interval)
                 
-                # Create new update listener with new interval
-                update_listener = async_track_time_interval(
-                    self.hass,
-                    entry_data.get("update_function"),
-                    timedelta(seconds=new_interval)
-                )
-                entry_data["update_listener"] = update_listener
-                entry_data["scan_interval"] = new_interval
-                
-                _LOGGER.debug(f"Updated scan interval to {new_interval} seconds")
+                _LOGGER.debug("Updated scan interval to %s seconds", new_interval)
             
             # Update the config entry with new data
             self.hass.config_entries.async_update_entry(
@@ -132,7 +117,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     "scan_interval": user_input["scan_interval"],
                 }
             )
-            _LOGGER.debug(f"Updated config entry data: {self.config_entry.data}")
+            _LOGGER.debug("Updated config entry data: %s", self.config_entry.data)
             
             # Only reload if IP or model changed (scan interval handled separately)
             if (user_input["inverter_ip"] != self.config_entry.data.get("inverter_ip") or
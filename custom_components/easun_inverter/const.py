@@ -0,0 +1,3 @@
+"""Constants for the Easun ISolar Inverter integration."""
+
+DOMAIN = "easun_inverter"
@@ -0,0 +1,96 @@
+"""Data update coordinator for the Easun ISolar Inverter integration."""
+from datetime import datetime, timedelta
+import logging
+import asyncio
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_BACKOFF_INTERVAL = timedelta(minutes=5)  # Longest gap between polls while the inverter keeps failing
+
+
+class EasunCoordinator(DataUpdateCoordinator):
+    """Fetch all inverter data in one bulk request per interval and share it with every sensor."""
+
+    def __init__(self, hass: HomeAssistant, isolar, scan_interval: int):
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=timedelta(seconds=scan_interval),
+            # Refresh requests within 2 seconds of each other share one bulk read
+            request_refresh_debouncer=Debouncer(hass, _LOGGER, cooldown=2.0, immediate=True),
+        )
+        self._isolar = isolar
+        self._update_timeout = 30
+        self._last_successful_update = None
+        self._scan_interval = timedelta(seconds=scan_interval)  # Restored after a successful refresh
+        self._consecutive_failures = 0
+        _LOGGER.info("EasunCoordinator initialized with model: %s", self._isolar.model)
+
+    async def _async_update_data(self) -> dict:
+        """Fetch all data, polling less often (up to every 5 minutes) while refreshes keep failing."""
+        try:
+            data = await self._fetch_all_data()
+        except UpdateFailed:
+            self._consecutive_failures += 1
+            self.update_interval = min(
+                self._scan_interval * 2 ** self._consecutive_failures,
+                max(self._scan_interval, MAX_BACKOFF_INTERVAL),
+            )
+            _LOGGER.warning("Update failed %d times in a row, next attempt in %s",
+                            self._consecutive_failures, self.update_interval)
+            raise
+
+        if self._consecutive_failures:
+            self._consecutive_failures = 0
+            self.update_interval = self._scan_interval
+        return data
+
+    async def _fetch_all_data(self) -> dict:
+        """Fetch all data from the inverter asynchronously using bulk request."""
+        _LOGGER.debug("Starting data update using model: %s", self._isolar.model)
+        try:
+            async with asyncio.timeout(self._update_timeout):
+                battery, pv, grid, output, status = await self._isolar.get_all_data()
+        except TimeoutError as e:
+            raise UpdateFailed("Update timed out") from e
+        except Exception as e:
+            raise UpdateFailed(f"Error updating data in bulk: {e}") from e
+
+        if all(x is None for x in (battery, pv, grid, output, status)):
+            raise UpdateFailed("No data received from inverter")
+
+        self._last_successful_update = datetime.now()  # Update timestamp on success
+        _LOGGER.debug("EasunCoordinator updated all data in bulk")
+        return {
+            'battery': battery,
+            'pv': pv,
+            'grid': grid,
+            'output': output,
+            'system': status,
+        }
+
+    def get_data(self, data_type):
+        """Get data for a specific type."""
+        return self.data.get(data_type) if self.data else None
+
+    @property
+    def last_update(self):
+        """Get the timestamp of the last successful update."""
+        return self._last_successful_update
+
+    def set_scan_interval(self, scan_interval: int):
+        """Change the regular polling interval; applies from the next refresh."""
+        self._scan_interval = timedelta(seconds=scan_interval)
+        self.update_interval = self._scan_interval
+
+    async def update_model(self, model: str):
+        """Update the inverter model."""
+        _LOGGER.info("Updating inverter model to: %s", model)
+        self._isolar.update_model(model)
@@ -1,20 +1,22 @@
 #!/usr/bin/env python3
 """Command-line interface for EasunPy"""
+from __future__ import annotations
 
 import asyncio
 import argparse
-from rich.live import Live
-from rich.table import Table
-from rich.console import Console
-from rich.layout import Layout
-from rich.text import Text
 from datetime import datetime
+from typing import TYPE_CHECKING
 from .async_isolar import AsyncISolar
 from .utils import get_local_ip
 from .discover import discover_device
 from .models import BatteryData, PVData, GridData, OutputData, SystemStatus, MODEL_CONFIGS
 import logging
 
+# rich is imported where output is rendered, so argument errors and failed discovery never load it
+if TYPE_CHECKING:
+    from rich.layout import Layout
+    from rich.text import Text
+
 class InverterData:
     """Data collector for inverter data."""
     def __init__(self):
@@ -41,6 +43,10 @@ class InverterData:
 
 def create_dashboard(inverter_data: InverterData, status_message: str | Text = "") -> Layout:
     """Create a dashboard layout with inverter data."""
+    from rich.layout import Layout
+    from rich.table import Table
+    from rich.text import Text
+
     layout = Layout()
     
     # Create tables for each section
@@ -159,6 +165,10 @@ def create_dashboard(inverter_data: InverterData, status_message: str | Text = "
 
 def create_info_layout(inverter_ip: str, local_ip: str, serial_number: str, status_message: str = "") -> Layout:
     """Create a layout showing connection information."""
+    from rich.layout import Layout
+    from rich.table import Table
+    from rich.text import Text
+
     layout = Layout()
     
     # Create info table
@@ -195,67 +205,72 @@ def create_info_layout(inverter_ip: str, local_ip: str, serial_number: str, stat
 
 async def print_single_update(inverter_data: InverterData):
     """Print a single update in simple format."""
+    from rich.console import Console
+
     console = Console()
     
     if not inverter_data.system:
         console.print("[red]No data received from inverter")
         return
 
-    console.print("\n[bold]System Status")
-    console.print(f"Operating Mode: {inverter_data.system.mode_name}")
+    # Collect the report and write it in one go
+    lines = ["\n[bold]System Status[/bold]"]
+    lines.append(f"Operating Mode: {inverter_data.system.mode_name}")
     if inverter_data.system.inverter_time:
-        console.print(f"Inverter Time: {inverter_data.system.inverter_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        lines.append(f"Inverter Time: {inverter_data.system.inverter_time.strftime('%Y-%m-%d %H:%M:%S')}")
 
     if inverter_data.battery:
-        console.print("\n[bold]Battery Status")
+        lines.append("\n[bold]Battery Status[/bold]")
         if inverter_data.battery.voltage is not None:
-            console.print(f"Voltage: {inverter_data.battery.voltage:.1f}V")
+            lines.append(f"Voltage: {inverter_data.battery.voltage:.1f}V")
         if inverter_data.battery.current is not None:
-            console.print(f"Current: {inverter_data.battery.current:.1f}A")
+            lines.append(f"Current: {inverter_data.battery.current:.1f}A")
         if inverter_data.battery.power is not None:
-            console.print(f"Power: {inverter_data.battery.power}W")
+            lines.append(f"Power: {inverter_data.battery.power}W")
         if inverter_data.battery.soc is not None:
-            console.print(f"State of Charge: {inverter_data.battery.soc}%")
+            lines.append(f"State of Charge: {inverter_data.battery.soc}%")
         if inverter_data.battery.temperature is not None:
-            console.print(f"Temperature: {inverter_data.battery.temperature}°C")
+            lines.append(f"Temperature: {inverter_data.battery.temperature}°C")
 
     if inverter_data.pv:
-        console.print("\n[bold]Solar Status")
+        lines.append("\n[bold]Solar Status[/bold]")
         if inverter_data.pv.total_power is not None:
-            console.print(f"Total Power: {inverter_data.pv.total_power}W")
+            lines.append(f"Total Power: {inverter_data.pv.total_power}W")
         if inverter_data.pv.charging_power is not None:
-            console.print(f"Charging Power: {inverter_data.pv.charging_power}W")
+            lines.append(f"Charging Power: {inverter_data.pv.charging_power}W")
         if inverter_data.pv.pv1_voltage is not None and inverter_data.pv.pv1_current is not None and inverter_data.pv.pv1_power is not None:
-            console.print(f"PV1: {inverter_data.pv.pv1_voltage:.1f}V, {inverter_data.pv.pv1_current:.1f}A, {inverter_data.pv.pv1_power}W")
+            lines.append(f"PV1: {inverter_data.pv.pv1_voltage:.1f}V, {inverter_data.pv.pv1_current:.1f}A, {inverter_data.pv.pv1_power}W")
         if inverter_data.pv.pv2_voltage is not None and inverter_data.pv.pv2_voltage > 0:
             if inverter_data.pv.pv2_current is not None and inverter_data.pv.pv2_power is not None:
-                console.print(f"PV2: {inverter_data.pv.pv2_voltage:.1f}V, {inverter_data.pv.pv2_current:.1f}A, {inverter_data.pv.pv2_power}W")
+                lines.append(f"PV2: {inverter_data.pv.pv2_voltage:.1f}V, {inverter_data.pv.pv2_current:.1f}A, {inverter_data.pv.pv2_power}W")
         if inverter_data.pv.pv_generated_today is not None and inverter_data.pv.pv_generated_today > 0:
-            console.print(f"Generated Today: {inverter_data.pv.pv_generated_today:.2f}kWh")
+            lines.append(f"Generated Today: {inverter_data.pv.pv_generated_today:.2f}kWh")
         if inverter_data.pv.pv_generated_total is not None and inverter_data.pv.pv_generated_total > 0:
-            console.print(f"Generated Total: {inverter_data.pv.pv_generated_total:.2f}kWh")
+            lines.append(f"Generated Total: {inverter_data.pv.pv_generated_total:.2f}kWh")
 
     if inverter_data.grid:
-        console.print("\n[bold]Grid Status")
+        lines.append("\n[bold]Grid Status[/bold]")
         if inverter_data.grid.voltage is not None:
-            console.print(f"Voltage: {inverter_data.grid.voltage:.1f}V")
+            lines.append(f"Voltage: {inverter_data.grid.voltage:.1f}V")
         if inverter_data.grid.power is not None:
-            console.print(f"Power: {inverter_data.grid.power}W")
+            lines.append(f"Power: {inverter_data.grid.power}W")
         if inverter_data.grid.frequency is not None:
-            console.print(f"Frequency: {inverter_data.grid.frequency/100:.2f}Hz")
+            lines.append(f"Frequency: {inverter_data.grid.frequency/100:.2f}Hz")
 
     if inverter_data.output:
-        console.print("\n[bold]Output Status")
+        lines.append("\n[bold]Output Status[/bold]")
         if inverter_data.output.voltage is not None:
-            console.print(f"Voltage: {inverter_data.output.voltage:.1f}V")
+            lines.append(f"Voltage: {inverter_data.output.voltage:.1f}V")
         if inverter_data.output.current is not None:
-            console.print(f"Current: {inverter_data.output.current:.1f}A")
+            lines.append(f"Current: {inverter_data.output.current:.1f}A")
         if inverter_data.output.power is not None:
-            console.print(f"Power: {inverter_data.output.power}W")
+            lines.append(f"Power: {inverter_data.output.power}W")
         if inverter_data.output.load_percentage is not None:
-            console.print(f"Load: {inverter_data.output.load_percentage}%")
+            lines.append(f"Load: {inverter_data.output.load_percentage}%")
         if inverter_data.output.frequency is not None:
-            console.print(f"Frequency: {inverter_data.output.frequency/100:.1f}Hz")
+            lines.append(f"Frequency: {inverter_data.output.frequency/100:.1f}Hz")
+
+    console.print("\n".join(lines))
 
 async def main():
     parser = argparse.ArgumentParser(description='Easun Inverter Monitor')
@@ -293,6 +308,8 @@ async def main():
             print("Error: Could not discover inverter IP")
             return 1
 
+    from rich.console import Console
+
     console = Console()
     
     try:
@@ -301,6 +318,9 @@ async def main():
 
         if args.continuous:
             # Use the existing dashboard view
+            from rich.live import Live
+            from rich.text import Text
+
             with Live(console=console, screen=True, refresh_per_second=4) as live:
                 while True:
                     try:
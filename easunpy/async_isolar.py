@@ -1,17 +1,17 @@
 import logging
 from typing import List, Optional, Dict, Tuple, Any
-from .async_modbusclient import AsyncModbusClient
+from .async_modbusclient import AsyncModbusClient, ModbusTCPPool
 from .modbusclient import create_request, decode_modbus_response
-from .isolar import BatteryData, PVData, GridData, OutputData, SystemStatus, OperatingMode
 import datetime
-from .models import MODEL_CONFIGS, ModelConfig
+from .models import BatteryData, PVData, GridData, OutputData, SystemStatus, MODEL_CONFIGS, ModelConfig
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 class AsyncISolar:
-    def __init__(self, inverter_ip: str, local_ip: str, model: str = "ISOLAR_SMG_II_11K"):
-        self.client = AsyncModbusClient(inverter_ip=inverter_ip, local_ip=local_ip)
+    def __init__(self, inverter_ip: str, local_ip: str, model: str = "ISOLAR_SMG_II_11K", pool: Optional[ModbusTCPPool] = None,
+                 direct_port: Optional[int] = None):
+        self.client = AsyncModbusClient(inverter_ip=inverter_ip, local_ip=local_ip, pool=pool, direct_port=direct_port)
         self._transaction_id = 0x0772
         
         if model not in MODEL_CONFIGS:
@@ -19,17 +19,21 @@ class AsyncISolar:
         
         self.model = model
         self.model_config = MODEL_CONFIGS[model]
-        logger.warning(f"AsyncISolar initialized with model: {model}")
+        logger.warning("AsyncISolar initialized with model: %s", model)
 
     def update_model(self, model: str):
         """Update the model configuration."""
         if model not in MODEL_CONFIGS:
             raise ValueError(f"Unknown inverter model: {model}. Available models: {list(MODEL_CONFIGS.keys())}")
         
-        logger.warning(f"Updating AsyncISolar to model: {model}")
+        logger.warning("Updating AsyncISolar to model: %s", model)
         self.model = model
         self.model_config = MODEL_CONFIGS[model]
 
+    async def close(self):
+        """Close the connection to the inverter."""
+        await self.client.close()
+
     def _get_next_transaction_id(self) -> int:
         """Get next transaction ID and increment counter."""
         current_id = self._transaction_id
@@ -45,7 +49,7 @@ class AsyncISolar:
                 for start, count in register_groups
             ]
             
-            logger.debug(f"Sending bulk request for register groups: {register_groups}")
+            logger.debug("Sending bulk request for register groups: %s", register_groups)
             responses = await self.client.send_bulk(requests)
              
             # Initialize results array with None values
@@ -56,47 +60,33 @@ class AsyncISolar:
                 try:
                     if response:  # Only decode if we got a response
                         decoded = decode_modbus_response(response, count, data_format)
-                        logger.debug(f"Decoded values for group {i}: {decoded}")
+                        logger.debug("Decoded values for group %d: %s", i, decoded)
                         decoded_groups[i] = decoded
                     else:
-                        logger.warning(f"No response for register group {register_groups[i]}")
+                        logger.warning("No response for register group %s", register_groups[i])
                 except Exception as e:
-                    logger.warning(f"Failed to decode register group {register_groups[i]}: {e}")
+                    logger.warning("Failed to decode register group %s: %s", register_groups[i], e)
                     # Keep None for this group
                 
             return decoded_groups
             
         except Exception as e:
-            logger.error(f"Error reading register groups: {str(e)}")
+            logger.error("Error reading register groups: %s", e)
             return [None] * len(register_groups)
 
     async def get_all_data(self) -> tuple[Optional[BatteryData], Optional[PVData], Optional[GridData], Optional[OutputData], Optional[SystemStatus]]:
         """Get all inverter data in a single bulk request."""
-        logger.warning(f"Getting all data for model: {self.model}")
+        logger.debug("Getting all data for model: %s", self.model)
         
-        # Group registers efficiently for bulk reading
-        register_groups = self._create_register_groups()
+        # Register groups are planned once per model
+        register_groups = self.model_config.read_plan
         
         results = await self._read_registers_bulk(register_groups)
         if not results:
             return None, None, None, None, None
             
-        # Create a dictionary to store all the read values
-        values = {}
-        
         # Process the results and apply scaling factors
-        for i, (start_address, count) in enumerate(register_groups):
-            if results[i] is None:
-                continue
-                
-            # Find which registers these values correspond to
-            for reg_name, config in self.model_config.register_map.items():
-                if config.address >= start_address and config.address < start_address + count:
-                    # Calculate the index in the results array
-                    idx = config.address - start_address
-                    if idx < len(results[i]):
-                        # Process the value with the appropriate scaling factor
-                        values[reg_name] = self.model_config.process_value(reg_name, results[i][idx])
+        values = self.model_config.decode_plan(results)
         
         # Create data objects from the processed values
         battery = self._create_battery_data(values)
@@ -107,40 +97,6 @@ class AsyncISolar:
         
         return battery, pv, grid, output, status
         
-    def _create_register_groups(self) -> list[tuple[int, int]]:
-        """Create optimized register groups for reading."""
-        # Get all valid register addresses
-        addresses = [
-            config.address for config in self.model_config.register_map.values() 
-            if config.address > 0  # Skip registers with address 0 (not supported)
-        ]
-        
-        if not addresses:
-            return []
-            
-        # Sort addresses
-        addresses.sort()
-        
-        # Group consecutive registers
-        groups = []
-        current_start = addresses[0]
-        current_end = current_start
-        
-        for addr in addresses[1:]:
-            # If address is consecutive or close enough, extend the current group
-            if addr <= current_end + 10:  # Allow small gaps to reduce number of requests
-                current_end = addr
-            else:
-                # Add the current group and start a new one
-                groups.append((current_start, current_end - current_start + 1))
-                current_start = addr
-                current_end = addr
-                
-        # Add the last group
-        groups.append((current_start, current_end - current_start + 1))
-        
-        return groups
-        
     def _create_battery_data(self, values: Dict[str, Any]) -> Optional[BatteryData]:
         """Create BatteryData object from processed values."""
         try:
@@ -153,7 +109,7 @@ class AsyncISolar:
                     temperature=values["battery_temperature"]
                 )
         except Exception as e:
-            logger.warning(f"Failed to create BatteryData: {e}")
+            logger.warning("Failed to create BatteryData: %s", e)
         return None
         
     def _create_pv_data(self, values: Dict[str, Any]) -> Optional[PVData]:
@@ -176,7 +132,7 @@ class AsyncISolar:
                     pv_generated_total=values.get("pv_energy_total")
                 )
         except Exception as e:
-            logger.warning(f"Failed to create PVData: {e}")
+            logger.warning("Failed to create PVData: %s", e)
         return None
         
     def _create_grid_data(self, values: Dict[str, Any]) -> Optional[GridData]:
@@ -189,7 +145,7 @@ class AsyncISolar:
                     frequency=values.get("grid_frequency")
                 )
         except Exception as e:
-            logger.warning(f"Failed to create GridData: {e}")
+            logger.warning("Failed to create GridData: %s", e)
         return None
         
     def _create_output_data(self, values: Dict[str, Any]) -> Optional[OutputData]:
@@ -205,7 +161,7 @@ class AsyncISolar:
                     frequency=values.get("output_frequency")
                 )
         except Exception as e:
-            logger.warning(f"Failed to create OutputData: {e}")
+            logger.warning("Failed to create OutputData: %s", e)
         return None
         
     def _create_system_status(self, values: Dict[str, Any]) -> Optional[SystemStatus]:
@@ -223,24 +179,11 @@ class AsyncISolar:
                     second = values["time_register_5"]
                     inverter_timestamp = datetime.datetime(year, month, day, hour, minute, second)
                 except Exception as e:
-                    logger.warning(f"Failed to create timestamp: {e}")
+                    logger.warning("Failed to create timestamp: %s", e)
 
             # Create operating mode
             if "operation_mode" in values:
-                mode_value = values["operation_mode"]
-                try:
-                    op_mode = OperatingMode(mode_value)
-                    return SystemStatus(
-                        operating_mode=op_mode,
-                        mode_name=op_mode.name,
-                        inverter_time=inverter_timestamp
-                    )
-                except ValueError:
-                    return SystemStatus(
-                        operating_mode=OperatingMode.FAULT,
-                        mode_name=f"UNKNOWN ({mode_value})",
-                        inverter_time=inverter_timestamp
-                    )
+                return SystemStatus.from_mode_value(values["operation_mode"], inverter_timestamp)
         except Exception as e:
-            logger.warning(f"Failed to create SystemStatus: {e}")
+            logger.warning("Failed to create SystemStatus: %s", e)
         return None 
\ No newline at end of file
@@ -1,63 +1,90 @@
 import asyncio
 import logging
 import socket
+import struct
 import time
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# MBAP length field (big-endian, bytes 4-5 of the header)
+_unpack_len = struct.Struct('>H').unpack_from
+
 class DiscoveryProtocol(asyncio.DatagramProtocol):
     """Protocol for UDP discovery of the inverter."""
-    def __init__(self, inverter_ip, message):
+    def __init__(self, inverter_ip, message, loop):
         self.transport = None
         self.inverter_ip = inverter_ip
         self.message = message
-        self.response_received = asyncio.get_event_loop().create_future()
+        self.response_received = loop.create_future()
+        self.hard_error = False
 
     def connection_made(self, transport):
         self.transport = transport
-        logger.debug(f"Sending UDP discovery message to {self.inverter_ip}:58899")
+        logger.debug("Sending UDP discovery message to %s:58899", self.inverter_ip)
         self.transport.sendto(self.message)
 
     def datagram_received(self, data, addr):
-        logger.info(f"Received response from {addr}")
-        self.response_received.set_result(True)
+        logger.info("Received response from %s", addr)
+        if not self.response_received.done():
+            self.response_received.set_result(True)
+
+    def error_received(self, exc):
+        logger.error("Error received: %s", exc)
+        self.hard_error = True
+        if not self.response_received.done():
+            self.response_received.set_result(False)
+
+class BroadcastDiscoveryProtocol(asyncio.DatagramProtocol):
+    """Protocol for broadcasting one discovery message and collecting every reply."""
+    def __init__(self, message):
+        self.transport = None
+        self.message = message
+        self.responders = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+        logger.debug("Broadcasting UDP discovery message to 255.255.255.255:58899")
+        self.transport.sendto(self.message, ('255.255.255.255', 58899))
+
+    def datagram_received(self, data, addr):
+        logger.info("Received response from %s", addr)
+        self.responders[addr[0]] = True
 
     def error_received(self, exc):
-        logger.error(f"Error received: {exc}")
-        self.response_received.set_result(False)
+        logger.error("Error received: %s", exc)
 
 class AsyncModbusClient:
-    def __init__(self, inverter_ip: str, local_ip: str, port: int = 8899):
+    def __init__(self, inverter_ip: str, local_ip: str, port: int = 8899, pool: "ModbusTCPPool | None" = None,
+                 direct_port: int | None = None):
         self.inverter_ip = inverter_ip
         self.local_ip = local_ip
+        self._pool = pool
+        if pool is not None:
+            port = pool.port
+            pool.register(self)
         self.port = port
+        self._discovery_message = f"set>server={local_ip}:{port};".encode()
+        self._discovery_addr = (inverter_ip, 58899)
         self._lock = asyncio.Lock()
         self._server = None
         self._consecutive_udp_failures = 0
         self._base_timeout = 5
-        self._active_connections = set()  # Track active connections
         self._reader = None
         self._writer = None
         self._connection_established = False
+        self._connected = asyncio.Event()  # Set once the inverter dials in
         self._last_activity = 0
-        self._connection_timeout = 30  # Timeout in seconds before considering connection stale
+        self._connection_timeout = 120  # Idle seconds before reconnecting; longer than the default 30 s poll interval
+        self._direct_port = direct_port  # Opt-in outbound Modbus TCP port; None always uses dial-back
+        self._direct_supported = None if direct_port else False  # Unknown until a valid framed reply
+        self._direct_connection = False  # Whether the current connection was opened outbound
 
     async def _cleanup_server(self):
-        """Cleanup server and all active connections."""
+        """Cleanup server and the active connection."""
         try:
-            # Close all active connections
-            for writer in self._active_connections.copy():
-                try:
-                    if not writer.is_closing():
-                        writer.close()
-                        await writer.wait_closed()
-                    else:
-                        logger.debug("Connection already closed")
-                except Exception as e:
-                    logger.debug(f"Error closing connection: {e}")
-                finally:
-                    self._active_connections.remove(writer)
+            # Close the active connection
+            await self._close_writer()
 
             # Close the server
             if self._server:
@@ -69,18 +96,38 @@ class AsyncModbusClient:
                     else:
                         logger.debug("Server already closed")
                 except Exception as e:
-                    logger.debug(f"Error closing server: {e}")
-                finally:
-                    self._server = None
+                    logger.debug("Error closing server: %s", e)
         except Exception as e:
-            logger.debug(f"Error during cleanup: {e}")
+            logger.debug("Error during cleanup: %s", e)
         finally:
             self._server = None
-            self._active_connections.clear()
             self._connection_established = False
             self._reader = None
             self._writer = None
 
+    async def close(self):
+        """Close the connection and server, and stop receiving connections from a shared pool."""
+        if self._pool is not None:
+            self._pool.unregister(self)
+        await self._cleanup_server()
+
+    async def _close_writer(self):
+        """Close the current connection, if any."""
+        writer = self._writer
+        if writer is None:
+            return
+        try:
+            if not writer.is_closing():
+                writer.close()
+                await writer.wait_closed()
+            else:
+                logger.debug("Connection already closed")
+        except Exception as e:
+            logger.debug("Error closing connection: %s", e)
+        finally:
+            self._reader = None
+            self._writer = None
+
     async def _find_available_port(self, start_port: int = 8899, max_attempts: int = 20) -> int:
         """Find an available port starting from the given port."""
         for port in range(start_port, start_port + max_attempts):
@@ -96,40 +143,46 @@ class AsyncModbusClient:
 
     async def send_udp_discovery(self) -> bool:
         """Perform UDP discovery with adaptive timeout."""
+        # A recent pool broadcast already told this inverter where to connect
+        if self._pool is not None and self._pool.claim_discovery(self.inverter_ip):
+            logger.debug("Using broadcast discovery result for %s", self.inverter_ip)
+            self._consecutive_udp_failures = 0
+            return True
+
         timeout = min(30, self._base_timeout * (1 + self._consecutive_udp_failures))
-        loop = asyncio.get_event_loop()
-        message = f"set>server={self.local_ip}:{self.port};".encode()
+        loop = asyncio.get_running_loop()
 
         for attempt in range(3):  # Try each discovery up to 3 times
             try:
                 transport, protocol = await loop.create_datagram_endpoint(
-                    lambda: DiscoveryProtocol(self.inverter_ip, message),
-                    remote_addr=(self.inverter_ip, 58899)
+                    lambda: DiscoveryProtocol(self.inverter_ip, self._discovery_message, loop),
+                    remote_addr=self._discovery_addr
                 )
 
                 try:
                     await asyncio.wait_for(protocol.response_received, timeout=timeout)
                     result = protocol.response_received.result()
-                    print(f"UDP discovery result: {result}")
+                    logger.debug("UDP discovery result: %s", result)
                     if result:
                         self._consecutive_udp_failures = 0  # Reset on success
                         return True
+                    if protocol.hard_error:
+                        # An explicit network error will not clear up by resending
+                        break
                 except asyncio.TimeoutError:
-                    logger.warning(f"UDP discovery timeout (attempt {attempt + 1}, timeout={timeout}s)")
+                    logger.warning("UDP discovery timeout (attempt %d, timeout=%ss)", attempt + 1, timeout)
                 finally:
                     transport.close()
-
-                await asyncio.sleep(1)  # Short delay between attempts
             except Exception as e:
-                logger.error(f"UDP discovery error: {str(e)}")
+                logger.error("UDP discovery error: %s", e)
 
         self._consecutive_udp_failures += 1
-        logger.error(f"UDP discovery failed after all attempts (failure #{self._consecutive_udp_failures})")
+        logger.error("UDP discovery failed after all attempts (failure #%d)", self._consecutive_udp_failures)
         return False
 
     async def _ensure_connection(self) -> bool:
         """Ensure we have a valid connection, establish one if needed."""
-        current_time = time.time()
+        current_time = time.monotonic()
         
         # Check if connection is stale
         if self._connection_established and (current_time - self._last_activity) > self._connection_timeout:
@@ -137,42 +190,106 @@ class AsyncModbusClient:
             await self._cleanup_server()
             self._connection_established = False
 
+        # Check if the inverter closed the kept-alive connection between polls
+        if self._connection_established and (self._writer.is_closing() or self._reader.at_eof()):
+            logger.info("Connection closed by inverter, reconnecting...")
+            await self._cleanup_server()
+            self._connection_established = False
+
+        if not self._connection_established and self._direct_supported is not False:
+            if await self._open_direct_connection():
+                return True
+
         if not self._connection_established:
             try:
-                # Find an available port
-                self.port = await self._find_available_port(self.port)
-                
+                # Make sure something is listening before the inverter is told to dial in
+                self._connected.clear()
+                await self._start_listener()
+
                 # Perform UDP discovery
                 if not await self.send_udp_discovery():
                     logger.error("UDP discovery failed")
                     return False
 
-                # Start server and wait for connection
-                self._server = await asyncio.start_server(
-                    self._handle_client_connection,
-                    self.local_ip, self.port
-                )
-                logger.info(f"Server started on {self.local_ip}:{self.port}")
-
                 # Wait for connection with timeout
                 try:
-                    await asyncio.wait_for(self._wait_for_connection(), timeout=10)
+                    await asyncio.wait_for(self._connected.wait(), timeout=10)
                 except asyncio.TimeoutError:
                     logger.error("Timeout waiting for client connection")
                     await self._cleanup_server()
                     return False
 
             except Exception as e:
-                logger.error(f"Error establishing connection: {e}")
+                logger.error("Error establishing connection: %s", e)
                 await self._cleanup_server()
                 return False
 
         return self._connection_established
 
-    async def _wait_for_connection(self):
-        """Wait for a client connection to be established."""
-        while not self._connection_established:
-            await asyncio.sleep(0.1)
+    def _is_listening(self) -> bool:
+        """Return True if the server the inverter dials into is bound."""
+        if self._pool is not None:
+            return self._pool.is_serving
+        return self._server is not None and self._server.is_serving()
+
+    async def _start_listener(self):
+        """Start this client's server, or the shared pool server, if not already bound."""
+        if self._is_listening():
+            return
+        if self._pool is not None:
+            await self._pool.start()
+            return
+
+        # Find an available port
+        port = await self._find_available_port(self.port)
+        if port != self.port:
+            self.port = port
+            self._discovery_message = f"set>server={self.local_ip}:{port};".encode()
+
+        self._server = await asyncio.start_server(
+            self._handle_client_connection,
+            self.local_ip, self.port
+        )
+        logger.info("Server started on %s:%s", self.local_ip, self.port)
+
+    async def _open_direct_connection(self) -> bool:
+        """Try to connect straight to the inverter's Modbus TCP port."""
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.inverter_ip, self._direct_port),
+                timeout=2
+            )
+        except Exception as e:
+            if self._direct_supported is None:
+                logger.info("Direct Modbus TCP not available on port %s, using UDP discovery: %s", self._direct_port, e)
+                self._direct_supported = False
+            else:
+                logger.debug("Direct connection failed, falling back to UDP discovery: %s", e)
+            return False
+
+        await self._close_writer()
+        self._reader = reader
+        self._writer = writer
+        self._direct_connection = True
+        self._connection_established = True
+        self._last_activity = time.monotonic()
+        logger.info("Direct connection established to %s:%s", self.inverter_ip, self._direct_port)
+        return True
+
+    def _abort_connection(self):
+        """Drop the current connection at once, without waiting for it to close."""
+        self._connection_established = False
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+
+    async def _fall_back_from_direct(self):
+        """Stop using the direct port after it failed to return a valid inverter frame."""
+        logger.warning("No valid reply on %s:%s, falling back to UDP discovery", self.inverter_ip, self._direct_port)
+        self._direct_supported = False
+        self._direct_connection = False
+        await self._close_writer()
 
     async def _handle_client_connection(self, reader, writer):
         """Handle incoming client connection."""
@@ -182,70 +299,193 @@ class AsyncModbusClient:
             await writer.wait_closed()
             return
 
+        # Drop a connection left over from a failed command before adopting the new one
+        await self._close_writer()
         self._reader = reader
         self._writer = writer
+        self._direct_connection = False
         self._connection_established = True
-        self._last_activity = time.time()
-        self._active_connections.add(writer)
+        self._last_activity = time.monotonic()
+        self._connected.set()
         logger.info("Client connection established")
 
-    async def send_bulk(self, hex_commands: list[str], retry_count: int = 5) -> list[str]:
-        """Send multiple Modbus TCP commands using persistent connection."""
+    async def send_bulk(self, commands: list[bytes], retry_count: int = 5) -> list[bytes]:
+        """Send multiple raw Modbus TCP commands using persistent connection.
+
+        Returns the raw response frames.
+        """
         async with self._lock:
-            responses = []
-            
+            backoff = 0.2
+
             for attempt in range(retry_count):
+                if attempt:
+                    # Single exponential back-off between attempts
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 5.0)
+
+                responses = []  # Replies from a failed attempt are not mixed into the retry
+
                 try:
                     if not await self._ensure_connection():
                         if attempt == retry_count - 1:
                             logger.error("Failed to establish connection after all attempts")
                             return []
-                        await asyncio.sleep(1)
                         continue
 
-                    for command in hex_commands:
-                        try:
-                            if self._writer.is_closing():
-                                logger.warning("Connection closed while processing commands")
+                    try:
+                        for command in commands:
+                            try:
+                                if self._writer.is_closing():
+                                    logger.warning("Connection closed while processing commands")
+                                    self._connection_established = False
+                                    break
+
+                                if logger.isEnabledFor(logging.DEBUG):
+                                    logger.debug("Sending command: %s", command.hex())
+                                self._writer.write(command)
+                                await self._writer.drain()
+
+                                # Read the MBAP header, then exactly the advertised payload
+                                header = await asyncio.wait_for(self._reader.readexactly(6), timeout=5)
+                                if header[:2] != command[:2]:
+                                    # A late reply to an earlier request; every following read would be shifted
+                                    logger.warning("Reply for transaction %s received while waiting for %s, reconnecting",
+                                                   header[:2].hex(), command[:2].hex())
+                                    self._abort_connection()
+                                    break
+                                pdu_length = _unpack_len(header, 4)[0]
+                                try:
+                                    pdu = await asyncio.wait_for(self._reader.readexactly(pdu_length), timeout=5)
+                                except asyncio.IncompleteReadError as e:
+                                    pdu = e.partial
+                                response = header + pdu
+                                if self._direct_connection and pdu[:2] != b'\xff\x04':
+                                    raise ValueError(f"unexpected frame {response.hex()}")
+
+                                if logger.isEnabledFor(logging.DEBUG):
+                                    logger.debug("Response: %s", response.hex())
+                                responses.append(response)
+                                self._last_activity = time.monotonic()
+
+                            except asyncio.TimeoutError:
+                                logger.error("Timeout reading response for command: %s", command.hex())
                                 self._connection_established = False
+                                if self._direct_connection:
+                                    await self._fall_back_from_direct()
                                 break
-
-                            logger.debug(f"Sending command: {command}")
-                            command_bytes = bytes.fromhex(command)
-                            self._writer.write(command_bytes)
-                            await self._writer.drain()
-
-                            response = await asyncio.wait_for(self._reader.read(1024), timeout=5)
-                            if len(response) >= 6:
-                                expected_length = int.from_bytes(response[4:6], 'big') + 6
-                                while len(response) < expected_length:
-                                    chunk = await asyncio.wait_for(self._reader.read(1024), timeout=5)
-                                    if not chunk:
-                                        break
-                                    response += chunk
-
-                            logger.debug(f"Response: {response.hex()}")
-                            responses.append(response.hex())
-                            self._last_activity = time.time()
-                            await asyncio.sleep(0.1)
-
-                        except asyncio.TimeoutError:
-                            logger.error(f"Timeout reading response for command: {command}")
-                            self._connection_established = False
-                            break
-                        except Exception as e:
-                            logger.error(f"Error processing command {command}: {e}")
-                            self._connection_established = False
-                            break
-
-                    if len(responses) == len(hex_commands):
+                            except Exception as e:
+                                logger.error("Error processing command %s: %s", command.hex(), e)
+                                self._connection_established = False
+                                if self._direct_connection:
+                                    await self._fall_back_from_direct()
+                                break
+                    except BaseException:
+                        # Cancelled mid-exchange (e.g. by the caller's timeout): a reply may still
+                        # arrive on this connection and would be read by the next request
+                        self._abort_connection()
+                        raise
+
+                    if len(responses) == len(commands):
+                        if self._direct_connection and self._direct_supported is None:
+                            logger.info("Inverter answers on %s:%s, keeping direct connections", self.inverter_ip, self._direct_port)
+                            self._direct_supported = True
                         return responses
 
                 except Exception as e:
-                    logger.error(f"Bulk send error: {e}")
+                    logger.error("Bulk send error: %s", e)
                     self._connection_established = False
                     await self._cleanup_server()
-                
-                await asyncio.sleep(1)
 
-            return [] 
\ No newline at end of file
+            return []
+
+
+class ModbusTCPPool:
+    """Single listening server shared by several inverters.
+
+    Every inverter is told to dial back to the same local_ip:port, and incoming
+    connections are handed to the AsyncModbusClient registered for the peer's
+    IP address. This avoids one listening socket (and port) per inverter.
+    """
+    def __init__(self, local_ip: str, port: int = 8899):
+        self.local_ip = local_ip
+        self.port = port
+        self._server = None
+        self._clients: dict[str, AsyncModbusClient] = {}
+        self._start_lock = asyncio.Lock()
+        self._discovered: dict[str, float] = {}  # Inverter IP -> monotonic time it answered discover_all()
+        self._discovery_ttl = 30.0  # Seconds a discover_all() answer stays usable
+
+    @property
+    def is_serving(self) -> bool:
+        """Return True if the shared server is bound and accepting connections."""
+        return self._server is not None and self._server.is_serving()
+
+    def register(self, client: AsyncModbusClient):
+        """Route connections from client.inverter_ip to client."""
+        self._clients[client.inverter_ip] = client
+
+    def unregister(self, client: AsyncModbusClient):
+        """Stop routing connections to client."""
+        if self._clients.get(client.inverter_ip) is client:
+            del self._clients[client.inverter_ip]
+
+    async def start(self):
+        """Start the shared server if it is not already serving."""
+        async with self._start_lock:
+            if self.is_serving:
+                return
+            self._server = await asyncio.start_server(
+                self._handle_connection,
+                self.local_ip, self.port
+            )
+            logger.info("Pool server started on %s:%s", self.local_ip, self.port)
+
+    async def discover_all(self, window: float = 2.0) -> dict[str, bool]:
+        """Broadcast one discovery message and collect every inverter that answers.
+
+        The message points every inverter at this pool's server, which is
+        started first. Register the clients before calling this so their
+        dial-backs are routed; they then skip their own UDP discovery on
+        their next connection attempt.
+        """
+        await self.start()
+        loop = asyncio.get_running_loop()
+        message = f"set>server={self.local_ip}:{self.port};".encode()
+        transport, protocol = await loop.create_datagram_endpoint(
+            lambda: BroadcastDiscoveryProtocol(message),
+            local_addr=('0.0.0.0', 0),
+            allow_broadcast=True
+        )
+        try:
+            await asyncio.sleep(window)
+        finally:
+            transport.close()
+
+        now = time.monotonic()
+        for ip in protocol.responders:
+            self._discovered[ip] = now
+        return dict(protocol.responders)
+
+    def claim_discovery(self, inverter_ip: str) -> bool:
+        """Return True, once, if inverter_ip answered a recent discover_all()."""
+        return time.monotonic() - self._discovered.pop(inverter_ip, float('-inf')) < self._discovery_ttl
+
+    async def _handle_connection(self, reader, writer):
+        """Hand an incoming connection to the client for its source IP."""
+        peer_ip = writer.get_extra_info('peername')[0]
+        client = self._clients.get(peer_ip)
+        if client is None:
+            logger.warning("Connection from unregistered inverter %s, closing", peer_ip)
+            writer.close()
+            await writer.wait_closed()
+            return
+        await client._handle_client_connection(reader, writer)
+
+    async def close(self):
+        """Close the shared server and every registered client's connection."""
+        for client in list(self._clients.values()):
+            await client._cleanup_server()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
@@ -56,19 +56,32 @@ auchCRCLo = [
 ]
 
 
+try:
+    # Optional C implementation, used when crcmod is installed
+    from crcmod.predefined import mkCrcFun
+    _crc16_ext = mkCrcFun('modbus')
+except ImportError:
+    _crc16_ext = None
+
+
 def crc16_modbus(data: bytes) -> int:
     """
     Calculate Modbus CRC16 using the algorithm provided in C.
     :param data: Input data as bytes
     :return: CRC as an integer
     """
+    if _crc16_ext is not None:
+        return _crc16_ext(bytes(data))
+
+    table_hi = auchCRCHi
+    table_lo = auchCRCLo
     ubCRCHi = 0xFF
     ubCRCLo = 0xFF
 
     for byte in data:
         index = ubCRCHi ^ byte
-        ubCRCHi = ubCRCLo ^ auchCRCHi[index]
-        ubCRCLo = auchCRCLo[index]
+        ubCRCHi = ubCRCLo ^ table_hi[index]
+        ubCRCLo = table_lo[index]
 
     # return (ubCRCHi << 8) | ubCRCLo  # Combine high and low bytes into a single value
     return (ubCRCLo << 8) | ubCRCHi  # Invertimos el orden para little-endian
\ No newline at end of file
@@ -1,3 +1,4 @@
+import select
 import socket
 import time
 
@@ -12,29 +13,39 @@ def discover_device():
 
     with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-        sock.settimeout(5)  # Shorter timeout per message
-        
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        # Pick the ephemeral port once; every probe and reply uses it
+        sock.bind(('0.0.0.0', 0))
+
+        # Send every probe up front, then listen once for all of them
         for message in discovery_messages:
             print(f"\nTrying discovery message: {message}")
-            
             try:
-                # Send to broadcast address
                 print(f"Broadcasting to 255.255.255.255:58899")
                 sock.sendto(message.encode(), ('255.255.255.255', 58899))
-                
-                # Listen for responses
-                start_time = time.time()
-                while time.time() - start_time < 2:  # Listen for 2 seconds per message
-                    try:
-                        data, addr = sock.recvfrom(1024)
-                        print(f"✓ Found device at {addr[0]}")
-                        print(f"  Response: {data.decode(errors='ignore')}")
-                        return addr[0]  # Return the first discovered IP address
-                    except socket.timeout:
-                        continue
             except Exception as e:
                 print(f"Error with message {message}: {str(e)}")
-                
+
+        # Listen for responses for 2 seconds in total
+        deadline = time.monotonic() + 2
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select([sock], [], [], remaining)
+            if not readable:
+                break
+            try:
+                data, addr = sock.recvfrom(1024)
+            except OSError as e:
+                print(f"Error receiving discovery response: {str(e)}")
+                continue
+            print(f"✓ Found device at {addr[0]}")
+            print(f"  Response: {data.decode(errors='ignore')}")
+            return addr[0]  # Return the first discovered IP address
+
         print("\nNo devices found")
     
     return None  # Return None if no devices are found
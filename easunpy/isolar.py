@@ -1,142 +1,182 @@
 import logging
-from typing import List, Optional
-from .modbusclient import ModbusClient, create_request, decode_modbus_response
-from easunpy.models import BatteryData, PVData, GridData, OutputData, OperatingMode, SystemStatus
+from typing import Any, Dict, List, Optional
+from .modbusclient import ModbusClient, create_request, decode_modbus_response, plan_reads
+from .models import BatteryData, PVData, GridData, OutputData, OperatingMode, SystemStatus, MODEL_CONFIGS
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Register names read by each getter below
+BATTERY_FIELDS = ("battery_voltage", "battery_current", "battery_power", "battery_soc", "battery_temperature")
+PV_FIELDS = (
+    "pv_total_power", "pv_charging_power", "pv_charging_current", "pv_temperature",
+    "pv1_voltage", "pv1_current", "pv1_power", "pv2_voltage", "pv2_current", "pv2_power",
+    "pv_energy_today", "pv_energy_total",
+)
+GRID_FIELDS = ("grid_voltage", "grid_power", "grid_frequency")
+OUTPUT_FIELDS = (
+    "output_voltage", "output_current", "output_power", "output_apparent_power",
+    "output_load_percentage", "output_frequency",
+)
+STATUS_FIELDS = ("operation_mode",)
+
 class ISolar:
-    def __init__(self, inverter_ip: str, local_ip: str):
+    def __init__(self, inverter_ip: str, local_ip: str, model: str = "ISOLAR_SMG_II_11K"):
+        if model not in MODEL_CONFIGS:
+            raise ValueError(f"Unknown inverter model: {model}. Available models: {list(MODEL_CONFIGS.keys())}")
+
         self.client = ModbusClient(inverter_ip=inverter_ip, local_ip=local_ip)
+        self.model = model
+        self.model_config = MODEL_CONFIGS[model]
+        self._plans = {}  # Read plans, keyed by the tuple of register names they cover
+
+    def read_bulk(self, start_register: int, count: int, data_format: str = "Int") -> List[int]:
+        """Read a contiguous block of registers in a single request."""
+        return self._read_registers(start_register, count, data_format)
+
+    def _read_fields(self, names: tuple) -> Optional[Dict[str, Any]]:
+        """
+        Read the registers behind the given register names with as few requests as possible.
+        Returns the processed values by register name, or None if any read fails.
+        """
+        plan = self._plans.get(names)
+        if plan is None:
+            addresses = sorted({
+                self.model_config.get_address(name) for name in names
+            } - {None, 0})  # Address 0 marks unsupported registers
+            plan = self._plans[names] = [
+                (start, count) for start, count, _ in plan_reads([(address, 1) for address in addresses], max_gap=125)
+            ]
+        return self._read_plan(plan)
+
+    def _read_plan(self, plan) -> Optional[Dict[str, Any]]:
+        """Run each (start, count) read of a plan and decode the blocks through the model layout."""
+        blocks = self._read_blocks(plan)
+        if blocks is None:
+            return None
+        values = {}
+        for (start, _), block in zip(plan, blocks):
+            values.update(self.model_config.decode_block(block, start))
+        return values
+
+    def _read_blocks(self, plan) -> Optional[List[List[int]]]:
+        """Read the raw block for each (start, count) of a plan, or None if any read fails."""
+        blocks = []
+        for start, count in plan:
+            block = self.read_bulk(start, count)
+            if len(block) != count:
+                return None
+            blocks.append(block)
+        return blocks
 
     def _read_registers(self, start_register: int, count: int, data_format: str = "Int") -> List[int]:
         """Read a sequence of registers."""
         try:
             request = create_request(0x0777, 0x0001, 0x01, 0x03, start_register, count)
-            logger.debug(f"Sending request for registers {start_register}-{start_register + count - 1}: {request}")
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug("Sending request for registers %d-%d: %s", start_register, start_register + count - 1, request.hex())
             
             response = self.client.send(request)
             if not response:
-                logger.warning(f"No response received for registers {start_register}-{start_register + count - 1}")
+                logger.warning("No response received for registers %d-%d", start_register, start_register + count - 1)
                 return []
             
-            logger.debug(f"Received response: {response}")
             decoded = decode_modbus_response(response, count, data_format)
-            logger.debug(f"Decoded values: {decoded}")
+            if debug:
+                logger.debug("Received response: %s", response.hex())
+                logger.debug("Decoded values: %s", decoded)
             return decoded
         except Exception as e:
-            logger.error(f"Error reading registers {start_register}-{start_register + count - 1}: {str(e)}")
+            logger.error("Error reading registers %d-%d: %s", start_register, start_register + count - 1, e)
             return []
 
     def get_battery_data(self) -> Optional[BatteryData]:
-        """Get battery information (registers 277-281)."""
-        values = self._read_registers(277, 5)
-        if not values or len(values) != 5:
-            return None
-        
-        return BatteryData(
-            voltage=values[0] / 10.0,
-            current=values[1] / 10.0,
-            power=values[2],
-            soc=values[3],
-            temperature=values[4]
-        )
+        """Get battery information."""
+        values = self._read_fields(BATTERY_FIELDS)
+        return self._build_battery_data(values) if values else None
 
     def get_pv_data(self) -> Optional[PVData]:
-        """Get PV information (combines multiple register groups)."""
-        pv_general = self._read_registers(302, 4)
-        if not pv_general or len(pv_general) != 4:
-            return None
+        """Get PV information."""
+        values = self._read_fields(PV_FIELDS)
+        return self._build_pv_data(values) if values else None
 
-        pv1_data = self._read_registers(346, 8)
-        if not pv1_data or len(pv1_data) != 8:
-            return None
+    def get_grid_data(self) -> Optional[GridData]:
+        """Get grid information."""
+        values = self._read_fields(GRID_FIELDS)
+        return self._build_grid_data(values) if values else None
 
-        pv2_data = self._read_registers(389, 3)
-        if not pv2_data or len(pv2_data) != 3:
-            return None
+    def get_output_data(self) -> Optional[OutputData]:
+        """Get output information."""
+        values = self._read_fields(OUTPUT_FIELDS)
+        return self._build_output_data(values) if values else None
 
-        return PVData(
-            total_power=pv_general[0],
-            charging_power=pv_general[1],
-            charging_current=pv_general[2] / 10.0,
-            temperature=pv_general[3],
-            pv1_voltage=pv1_data[5] / 10.0,
-            pv1_current=pv1_data[6] / 10.0,
-            pv1_power=pv1_data[7],
-            pv2_voltage=pv2_data[0] / 10.0,
-            pv2_current=pv2_data[1] / 10.0,
-            pv2_power=pv2_data[2]
+    def get_operating_mode(self) -> Optional[SystemStatus]:
+        """Get system operating mode."""
+        values = self._read_fields(STATUS_FIELDS)
+        return self._build_system_status(values) if values else None
+
+    def get_all_data(self) -> tuple:
+        """Get battery, PV, grid, output and status data with the fewest possible requests."""
+        blocks = self._read_blocks(self.model_config.read_plan)
+        if blocks is None:
+            return None, None, None, None, None
+        values = self.model_config.decode_plan(blocks)
+        return (
+            self._build_battery_data(values),
+            self._build_pv_data(values),
+            self._build_grid_data(values),
+            self._build_output_data(values),
+            self._build_system_status(values),
         )
 
-    def get_grid_data(self) -> Optional[GridData]:
-        """Get grid information (registers 338, 340, 342)."""
-        # Register 338: Grid voltage
-        # Register 340: Grid power
-        # Register 607: Grid frequency (50.00Hz = 5000)
-        
-        # Read grid voltage and power
-        values = self._read_registers(338, 3)
-        if not values or len(values) != 3:
-            return None
-        
-        # Read frequency from correct register
-        freq = self._read_registers(607, 1)
-        if not freq:
-            return None
+    def _build_battery_data(self, values: Dict[str, Any]) -> BatteryData:
+        return BatteryData(
+            voltage=values.get("battery_voltage"),
+            current=values.get("battery_current"),
+            power=values.get("battery_power"),
+            soc=values.get("battery_soc"),
+            temperature=values.get("battery_temperature")
+        )
 
-        return GridData(
-            voltage=values[0] / 10.0,
-            power=values[2],
-            frequency=freq[0]  # Already in the correct format (5000 = 50.00Hz)
+    def _build_pv_data(self, values: Dict[str, Any]) -> PVData:
+        return PVData(
+            total_power=values.get("pv_total_power"),
+            charging_power=values.get("pv_charging_power"),
+            charging_current=values.get("pv_charging_current"),
+            temperature=values.get("pv_temperature"),
+            pv1_voltage=values.get("pv1_voltage"),
+            pv1_current=values.get("pv1_current"),
+            pv1_power=values.get("pv1_power"),
+            pv2_voltage=values.get("pv2_voltage"),
+            pv2_current=values.get("pv2_current"),
+            pv2_power=values.get("pv2_power"),
+            pv_generated_today=values.get("pv_energy_today"),
+            pv_generated_total=values.get("pv_energy_total")
         )
 
-    def get_output_data(self) -> Optional[OutputData]:
-        """Get output information (registers 346-350, 607)."""
-        # Register 346: Output voltage
-        # Register 347: Output current
-        # Register 348: Output power
-        # Register 349: Output apparent power
-        # Register 350: Load percentage
-        # Register 607: Output frequency (50.00Hz = 5000)
-        
-        # Read output parameters
-        values = self._read_registers(346, 5)
-        if not values or len(values) != 5:
-            return None
-        
-        # Read frequency from correct register
-        freq = self._read_registers(607, 1)
-        if not freq:
-            return None
+    def _build_grid_data(self, values: Dict[str, Any]) -> GridData:
+        return GridData(
+            voltage=values.get("grid_voltage"),
+            power=values.get("grid_power"),
+            frequency=values.get("grid_frequency")  # 50.00Hz = 5000
+        )
 
+    def _build_output_data(self, values: Dict[str, Any]) -> OutputData:
         return OutputData(
-            voltage=values[0] / 10.0,
-            current=values[1] / 10.0,
-            power=values[2],
-            apparent_power=values[3],
-            load_percentage=values[4],
-            frequency=freq[0]  # Already in the correct format (5000 = 50.00Hz)
+            voltage=values.get("output_voltage"),
+            current=values.get("output_current"),
+            power=values.get("output_power"),
+            apparent_power=values.get("output_apparent_power"),
+            load_percentage=values.get("output_load_percentage"),
+            frequency=values.get("output_frequency")  # 50.00Hz = 5000
         )
 
-    def get_operating_mode(self) -> Optional[SystemStatus]:
-        """Get system operating mode (register 600)."""
-        values = self._read_registers(600, 1)
-        if not values:
+    def _build_system_status(self, values: Dict[str, Any]) -> Optional[SystemStatus]:
+        value = values.get("operation_mode")
+        if value is None:
             return None
-
-        try:
-            mode = OperatingMode(values[0])
-            return SystemStatus(
-                operating_mode=mode,
-                mode_name=mode.name
-            )
-        except ValueError:
-            return SystemStatus(
-                operating_mode=OperatingMode.FAULT,
-                mode_name=f"UNKNOWN ({values[0]})"
-            ) 
+        return SystemStatus.from_mode_value(value)
 
     def is_connected(self) -> bool:
         """Check if the inverter is connected by attempting to retrieve the serial number."""
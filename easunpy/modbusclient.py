@@ -1,27 +1,74 @@
+import select
 import socket
 import struct
+import threading
 import time
 import logging  # Import logging
+from functools import lru_cache
 
 from easunpy.crc import crc16_modbus
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# MBAP length field (big-endian, bytes 4-5 of the header)
+_unpack_len = struct.Struct('>H').unpack_from
+
+# Precompiled packers for request frames
+_MBAP = struct.Struct('>HHH')        # Transaction ID, Protocol ID, length
+_RTU_HEADER = struct.Struct('>BBHH')  # Unit ID, function code, register address, register count
+_CRC = struct.Struct('<H')           # CRC16, low byte first
+
+def _recv_exact(sock: socket.socket, view: memoryview) -> int:
+    """Fill view from sock, stopping early on EOF. Returns the number of bytes read."""
+    got = 0
+    while got < len(view):
+        n = sock.recv_into(view[got:])
+        if not n:
+            break
+        got += n
+    return got
+
+def _recv_frame(sock: socket.socket, buf: memoryview) -> bytes:
+    """
+    Read one Modbus TCP frame into buf: the MBAP header, then exactly the
+    advertised payload. Only the finished frame is copied out.
+    """
+    got = _recv_exact(sock, buf[:6])
+    if not got:
+        raise ConnectionResetError("Connection closed by inverter")
+    if got < 6:
+        return bytes(buf[:got])
+
+    total = 6 + _unpack_len(buf, 4)[0]
+    if total > len(buf):
+        # Larger than the scratch buffer; fall back to a one-off buffer
+        header = bytes(buf[:6])
+        buf = memoryview(bytearray(total))
+        buf[:6] = header
+    got = _recv_exact(sock, buf[6:total])
+    return bytes(buf[:6 + got])
+
 class ModbusClient:
     def __init__(self, inverter_ip: str, local_ip: str, port: int = 8899):
         self.inverter_ip = inverter_ip
         self.local_ip = local_ip
         self.port = port
         self.request_id = 0  # Add request ID counter
+        self._client_sock = None  # Connection accepted from the inverter, kept across requests
+        self._discovered = False  # Whether the inverter has been told our server address
+        self._accept_timeout = 10  # Seconds to wait for the inverter to dial back
+        self._read_timeout = 5  # Seconds to wait for a response on the kept-open connection
+        self._lock = threading.Lock()
+        self._rxbuf = bytearray(4096)  # Reused for every response frame
+        self._rxmv = memoryview(self._rxbuf)
 
     def send_udp_discovery(self) -> bool:
         """Perform UDP discovery to initialize the inverter communication."""
         with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp_sock:
             udp_message = f"set>server={self.local_ip}:{self.port};"
             try:
-                logger.debug(f"Sending UDP discovery message to {self.inverter_ip}:58899")
+                logger.debug("Sending UDP discovery message to %s:58899", self.inverter_ip)
                 udp_sock.sendto(udp_message.encode(), (self.inverter_ip, 58899))
                 response, _ = udp_sock.recvfrom(1024)
                 return True
@@ -29,166 +76,236 @@ class ModbusClient:
                 logger.error("UDP discovery timed out")
                 return False
             except Exception as e:
-                logger.error(f"Error sending UDP discovery message: {e}")
+                logger.error("Error sending UDP discovery message: %s", e)
                 return False
 
-    def send(self, hex_command: str, retry_count: int = 2) -> str:
-        """Send a Modbus TCP command."""
-        command_bytes = bytes.fromhex(hex_command)
-        logger.info(f"Sending command: {hex_command}")
-
-        for attempt in range(retry_count):
-            logger.debug(f"Attempt {attempt + 1} of {retry_count}")
-            
-            if not self.send_udp_discovery():
-                logger.info("UDP discovery failed")
-                time.sleep(1)
-                continue
+    def _connect(self) -> bool:
+        """Accept the inverter's TCP connection, running UDP discovery only when needed."""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as tcp_server:
+            tcp_server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            tcp_server.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            # Accepted sockets inherit this, so the first response is not held back by Nagle
+            tcp_server.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            tcp_server.settimeout(self._accept_timeout)
+
+            try:
+                # Attempt to bind to the local IP and port
+                logger.debug("Binding to %s:%s", self.local_ip, self.port)
+                tcp_server.bind((self.local_ip, self.port))
+                tcp_server.listen(1)
+            except Exception as e:
+                logger.error("Error: %s", e)
+                return False
+
+            # The inverter keeps dialing back to the last server address it was given,
+            # so discovery is only repeated after it failed to connect
+            if not self._discovered:
+                if not self.send_udp_discovery():
+                    logger.info("UDP discovery failed")
+                    return False
+                self._discovered = True
+
+            try:
+                logger.debug("Waiting for client connection...")
+                client_sock, addr = tcp_server.accept()
+                logger.info("Client connected from %s", addr)
+            except socket.timeout:
+                logger.info("Inverter did not connect within %ss", self._accept_timeout)
+                self._discovered = False
+                return False
+            except Exception as e:
+                logger.error("Error: %s", e)
+                return False
+
+        # A silently dropped connection must not block a reader (and the lock) forever
+        client_sock.settimeout(self._read_timeout)
+        client_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client_sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        self._client_sock = client_sock
+        return True
+
+    def _connection_alive(self) -> bool:
+        """Check, without blocking, that the idle connection can be reused."""
+        try:
+            readable, _, _ = select.select([self._client_sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        # An idle socket should have nothing to read: readable means the inverter
+        # closed it, or a stale response from a timed-out request is pending
+        return not readable
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Close the connection to the inverter, if open."""
+        if self._client_sock is not None:
+            try:
+                self._client_sock.close()
+            except OSError as e:
+                logger.debug("Error closing connection: %s", e)
+            self._client_sock = None
+
+    def send(self, command: bytes, retry_count: int = 2) -> bytes:
+        """Send a Modbus TCP command over the persistent connection and return the raw response."""
+        if isinstance(command, str):
+            command = bytes.fromhex(command)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending command: %s", command.hex())
+
+        with self._lock:
+            for attempt in range(retry_count):
+                logger.debug("Attempt %d of %d", attempt + 1, retry_count)
+
+                if self._client_sock is not None and not self._connection_alive():
+                    logger.debug("Idle connection is no longer usable, reconnecting")
+                    self.close()
 
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as tcp_server:
-                tcp_server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                tcp_server.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
-                
+                if self._client_sock is None and not self._connect():
+                    time.sleep(1)
+                    continue
+
+                client_sock = self._client_sock
                 try:
-                    # Attempt to bind to the local IP and port
-                    logger.debug(f"Binding to {self.local_ip}:{self.port}")
-                    tcp_server.bind((self.local_ip, self.port))
-                    tcp_server.listen(1)
-
-                    logger.debug("Waiting for client connection...")
-                    client_sock, addr = tcp_server.accept()
-                    logger.info(f"Client connected from {addr}")
-                    
-                    with client_sock:
-                        logger.debug("Sending command bytes...")
-                        client_sock.sendall(command_bytes)
-
-                        logger.debug("Waiting for response...")
-                        response = client_sock.recv(1024)
-                        
-                        if len(response) >= 6:
-                            expected_length = int.from_bytes(response[4:6], 'big') + 6
-                            
-                            while len(response) < expected_length:
-                                chunk = client_sock.recv(1024)
-                                if not chunk:
-                                    break
-                                response += chunk
-
-                        response_hex = response.hex()
-                        logger.info(f"Received response: {response_hex}")
-                        return response_hex
+                    logger.debug("Sending command bytes...")
+                    client_sock.sendall(command)
+
+                    logger.debug("Waiting for response...")
+                    response = _recv_frame(client_sock, self._rxmv)
+
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Received response: %s", response.hex())
+                    return response
 
                 except socket.timeout:
-                    logger.info("Socket timeout")
-                    time.sleep(1)
+                    # Likely a half-open connection; tell the inverter where to dial again
+                    logger.info("No response within %ss, reconnecting", self._read_timeout)
+                    self.close()
+                    self._discovered = False
                     continue
-                except Exception as e:
-                    logger.error(f"Error: {str(e)}")
-                    time.sleep(1)
+                except OSError as e:
+                    # Drop the dead connection; the next attempt reconnects
+                    logger.info("Connection lost (%s), reconnecting", e)
+                    self.close()
                     continue
 
-        logger.info("All retry attempts failed")
-        return ""
+            logger.info("All retry attempts failed")
+            return b""
 
-def run_single_request(inverter_ip: str, local_ip: str, request: str):
+def run_single_request(inverter_ip: str, local_ip: str, request: bytes):
     """
     Sends a single Modbus request to the inverter.
     """
-    inverter = ModbusClient(inverter_ip=inverter_ip, local_ip=local_ip)
-    response = inverter.send(request)
-    return response
+    with ModbusClient(inverter_ip=inverter_ip, local_ip=local_ip) as inverter:
+        return inverter.send(request)
+
+@lru_cache(maxsize=256)
+def _rtu_packet(unit_id: int, function_code: int, register_address: int, register_offset: int) -> bytes:
+    """
+    Build the FF04-prefixed RTU packet with its CRC. It does not depend on the
+    transaction ID, so it is cached for the fixed register groups read on every poll.
+    """
+    # Construir el paquete RTU
+    rtu_packet = _RTU_HEADER.pack(unit_id, function_code, register_address, register_offset)
+
+    # Calcular el CRC y agregarlo al paquete RTU (byte bajo primero)
+    rtu_packet += _CRC.pack(crc16_modbus(rtu_packet))
+
+    # Campo adicional `FF04`
+    return b'\xff\x04' + rtu_packet
 
 # Función para crear la solicitud completa
 def create_request(transaction_id: int, protocol_id: int, unit_id: int, function_code: int,
-                   register_address: int, register_offset: int) -> str:
+                   register_address: int, register_offset: int) -> bytes:
     """
     Create a Modbus command with the correct length and CRC for the RTU packet.
     """
-    # Construir el paquete RTU
-    rtu_packet = bytearray([
-        unit_id,
-        function_code,
-        (register_address >> 8) & 0xFF, register_address & 0xFF,
-        (register_offset >> 8) & 0xFF, register_offset & 0xFF
-    ])
-
-    # Calcular el CRC para el paquete RTU
-    crc = crc16_modbus(rtu_packet)
-    crc_low = crc & 0xFF
-    crc_high = (crc >> 8) & 0xFF
-
-    # Agregar CRC al paquete RTU
-    rtu_packet.extend([crc_low, crc_high])
-    
-    # Campo adicional `FF04`
-    rtu_packet = bytearray([0xFF, 0x04]) + rtu_packet
-    
-    # Calcular la longitud total (incluye solo RTU) + TCP
-    length = len(rtu_packet)
-    
-    # Construir el comando completo
-    command = bytearray([
-        (transaction_id >> 8) & 0xFF, transaction_id & 0xFF,  # Transaction ID
-        (protocol_id >> 8) & 0xFF, protocol_id & 0xFF,        # Protocol ID
-        (length >> 8) & 0xFF, length & 0xFF                  # Longitud
-    ]) + rtu_packet
-
-    return command.hex()
-
-def decode_modbus_response(response: str, register_count: int=1, data_format: str="Int"):
+    rtu_packet = _rtu_packet(unit_id, function_code, register_address, register_offset)
+
+    # Cabecera TCP: Transaction ID, Protocol ID, longitud (incluye solo RTU)
+    return _MBAP.pack(transaction_id, protocol_id, len(rtu_packet)) + rtu_packet
+
+# struct type codes for 16-bit register formats
+_REGISTER_TYPE_CODES = {
+    "Int": "h",          # Signed 16-bit integers
+    "UnsignedInt": "H",  # Unsigned 16-bit integers (0 to 65535)
+}
+
+# Response header: transaction ID, protocol ID, length, FF04 (skipped), unit ID, function code, byte count
+_RESPONSE_HEADER = struct.Struct('>HHH2xBBB')
+_DATA_OFFSET = _RESPONSE_HEADER.size
+
+@lru_cache(maxsize=None)
+def _register_unpacker(register_count: int, data_format: str):
+    """Return a compiled big-endian unpacker for register_count registers."""
+    if data_format == "Float":
+        # IEEE 754 single precision values span two registers each
+        return struct.Struct(f'>{register_count // 2}f').unpack_from
+    if data_format not in _REGISTER_TYPE_CODES:
+        raise ValueError(f"Unsupported data format: {data_format}")
+    return struct.Struct(f'>{register_count}{_REGISTER_TYPE_CODES[data_format]}').unpack_from
+
+def decode_modbus_response(response: bytes, register_count: int=1, data_format: str="Int"):
     """
     Decodes a Modbus TCP response using the provided format.
-    :param request: Hexadecimal string of the Modbus request.
-    :param response: Hexadecimal string of the Modbus response.
-    :return: Dictionary with register addresses and their values.
+    :param response: Raw Modbus response frame (a hexadecimal string is also accepted).
+    :param register_count: Number of registers in the response.
+    :param data_format: "Int", "UnsignedInt" or "Float".
+    :return: List of decoded register values.
     """
-    # Extract common fields from response
-    req_id = response[:8]
-    length_hex = response[8:12]
-    length = int(length_hex, 16)
-    
-    # Extract RTU payload
-    rtu_payload = response[12:12 + length * 2]
-
-    # Decode RTU Payload
-    extra_field = rtu_payload[:2]
-    device_address = rtu_payload[2:4]
-    function_code = rtu_payload[4:6]
-    num_data_bytes = int(rtu_payload[8:10], 16)
-    data_bytes = rtu_payload[10:10 + num_data_bytes * 2]
-    # Decode the register values and pair with addresses
-    values = []
-    for i, _ in enumerate(range(register_count)):
-        if data_format == "Int":
-            # Handle signed 16-bit integers
-            value = int(data_bytes[i * 4:(i + 1) * 4], 16)
-            # If the highest bit is set (value >= 32768), it's negative
-            if value >= 32768:  # 0x8000
-                value -= 65536  # 0x10000
-        elif data_format == "UnsignedInt":
-            # Handle unsigned 16-bit integers (0 to 65535)
-            value = int(data_bytes[i * 4:(i + 1) * 4], 16)
-        elif data_format == "Float":
-            value = struct.unpack('f', bytes.fromhex(data_bytes[i * 4:(i + 1) * 4]))[0]
-        else:
-            raise ValueError(f"Unsupported data format: {data_format}")
-        values.append(value)
-
-    return values
-
-def get_registers_from_request(request: str) -> list:
+    if isinstance(response, str):
+        response = bytes.fromhex(response)
+    _, _, _, _, function_code, byte_count = _RESPONSE_HEADER.unpack_from(response)
+    if function_code & 0x80:
+        # Exception responses carry the exception code where the byte count would be
+        raise ValueError(f"Modbus exception response: function 0x{function_code:02x}, code {byte_count}")
+    if byte_count != register_count * 2:
+        # A reply sized for a different read (e.g. a stale frame) must not be decoded as this one
+        raise ValueError(f"Response holds {byte_count} data bytes, expected {register_count * 2}")
+    return list(_register_unpacker(register_count, data_format)(response, _DATA_OFFSET))
+
+# Register address and count follow MBAP (6 bytes), FF04 (2), unit ID and function code
+_unpack_register_range = struct.Struct('>HH').unpack_from
+
+@lru_cache(maxsize=1024)
+def _request_register_range(request: bytes) -> tuple:
+    """Parse (register_address, register_count) from a Modbus request."""
+    if isinstance(request, str):
+        request = bytes.fromhex(request)
+    return _unpack_register_range(request, 10)
+
+def get_registers_from_request(request: bytes) -> list:
     """
     Extracts register addresses from a Modbus request
-    :param request: Hexadecimal string of the Modbus request
+    :param request: Raw Modbus request (a hexadecimal string is also accepted)
     :return: List of register addresses
     """
-    rtu_payload = request[12:]  # Skip TCP header
-    register_address = int(rtu_payload[8:12], 16)  # Get register address from RTU payload
-    register_count = int(rtu_payload[12:16], 16)  # Get number of registers
-    
-    registers = []
-    for i in range(register_count):
-        registers.append(register_address + i)
-        
-    return registers
+    register_address, register_count = _request_register_range(request)
+    return list(range(register_address, register_address + register_count))
+
+def plan_reads(ranges, max_gap: int = 16, max_span: int = 125) -> list:
+    """
+    Merges register ranges into as few Modbus reads as possible.
+    :param ranges: Iterable of (start_register, count) tuples
+    :param max_gap: Largest run of unused registers allowed inside a single read
+    :param max_span: Maximum number of registers per read (Modbus allows 125)
+    :return: List of (start, count, [(orig_start, orig_count, offset), ...]) tuples,
+             where offset is the position of the original range within the read
+    """
+    plan = []
+    for start, count in sorted(set(ranges)):
+        end = start + count
+        if plan:
+            read_start, read_count, members = plan[-1]
+            read_end = read_start + read_count
+            new_end = max(end, read_end)
+            fits = new_end == read_end or new_end - read_start <= max_span
+            if start - read_end <= max_gap and fits:
+                plan[-1] = (read_start, new_end - read_start, members)
+                members.append((start, count, start - read_start))
+                continue
+        plan.append((start, count, [(start, count, 0)]))
+    return plan
@@ -1,9 +1,12 @@
+from bisect import bisect_left
 from dataclasses import dataclass, field
 from enum import Enum
 import datetime
-from typing import Dict, Optional, Callable, Any
+from typing import Dict, Optional, Callable, Any, Tuple
 
-@dataclass
+from .modbusclient import plan_reads
+
+@dataclass(slots=True)
 class BatteryData:
     voltage: float
     current: float
@@ -11,7 +14,7 @@ class BatteryData:
     soc: int
     temperature: int
 
-@dataclass
+@dataclass(slots=True)
 class PVData:
     total_power: int
     charging_power: int
@@ -26,13 +29,13 @@ class PVData:
     pv_generated_today: int
     pv_generated_total: int
 
-@dataclass
+@dataclass(slots=True)
 class GridData:
     voltage: float
     power: int
     frequency: int
 
-@dataclass
+@dataclass(slots=True)
 class OutputData:
     voltage: float
     current: float
@@ -44,13 +47,25 @@ class OutputData:
 class OperatingMode(Enum):
     SUB = 2
     SBU = 3
+    FAULT = 6
 
-@dataclass
+# Mode and display name by raw register value, so lookups need no Enum call or exception
+_OPERATING_MODES = {mode.value: (mode, mode.name) for mode in OperatingMode}
+
+@dataclass(slots=True)
 class SystemStatus:
     operating_mode: OperatingMode
     mode_name: str 
     inverter_time: datetime.datetime
 
+    @classmethod
+    def from_mode_value(cls, value: int, inverter_time: Optional[datetime.datetime] = None) -> "SystemStatus":
+        """Build the status for a raw operation mode value; unknown codes are reported as FAULT."""
+        known = _OPERATING_MODES.get(value)
+        if known is None:
+            return cls(OperatingMode.FAULT, f"UNKNOWN ({value})", inverter_time)
+        return cls(known[0], known[1], inverter_time)
+
 @dataclass
 class RegisterConfig:
     """Configuration for a single register."""
@@ -63,6 +78,56 @@ class ModelConfig:
     """Complete configuration for an inverter model."""
     name: str
     register_map: Dict[str, RegisterConfig] = field(default_factory=dict)
+    # (name, address, scale_factor, processor) for every readable register, sorted by address
+    layout: Tuple[Tuple[str, int, float, Optional[Callable[[int], Any]]], ...] = field(init=False, repr=False, compare=False)
+    addresses: Tuple[int, ...] = field(init=False, repr=False, compare=False)
+    # (start, count) requests covering every readable register, computed once per model
+    read_plan: Tuple[Tuple[int, int], ...] = field(init=False, repr=False, compare=False)
+    # (name, offset, scale_factor, processor) rows decoded from each read_plan block
+    plan_layout: Tuple[Tuple[Tuple[str, int, float, Optional[Callable[[int], Any]]], ...], ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Address 0 marks registers the model does not support
+        self.layout = tuple(sorted(
+            ((name, config.address, config.scale_factor, config.processor)
+             for name, config in self.register_map.items() if config.address > 0),
+            key=lambda row: row[1]
+        ))
+        self.addresses = tuple(row[1] for row in self.layout)
+        # Allow small gaps to reduce the number of requests
+        self.read_plan = tuple(
+            (start, count) for start, count, _ in plan_reads([(address, 1) for address in self.addresses], max_gap=10)
+        )
+        self.plan_layout = tuple(
+            tuple(
+                (name, address - start, scale_factor, processor)
+                for name, address, scale_factor, processor in self.layout[
+                    bisect_left(self.addresses, start):bisect_left(self.addresses, start + count)
+                ]
+            )
+            for start, count in self.read_plan
+        )
+
+    def decode_block(self, block, start: int) -> Dict[str, Any]:
+        """Process every configured register covered by a block of raw values read from start."""
+        first = bisect_left(self.addresses, start)
+        last = bisect_left(self.addresses, start + len(block))
+        values = {}
+        for name, address, scale_factor, processor in self.layout[first:last]:
+            value = block[address - start]
+            values[name] = processor(value) if processor else value * scale_factor
+        return values
+
+    def decode_plan(self, blocks) -> Dict[str, Any]:
+        """Process the blocks read for read_plan, in plan order; blocks that are None are skipped."""
+        values = {}
+        for rows, block in zip(self.plan_layout, blocks):
+            if block is None:
+                continue
+            for name, offset, scale_factor, processor in rows:
+                value = block[offset]
+                values[name] = processor(value) if processor else value * scale_factor
+        return values
     
     # Helper method to get a register address
     def get_address(self, register_name: str) -> Optional[int]: